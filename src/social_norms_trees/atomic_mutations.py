@@ -1,9 +1,21 @@
-from collections import namedtuple
+from dataclasses import dataclass
 import inspect
-from functools import partial, wraps
+from functools import cache, lru_cache, partial, wraps
 import logging
+import sys
 from types import GenericAlias
-from typing import Callable, List, Mapping, NamedTuple, Tuple, TypeVar, Union, Dict
+from typing import (
+    Any,
+    Callable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    Dict,
+)
 
 import click
 import py_trees
@@ -25,10 +37,96 @@ BehaviorIdentifier = TypeVar(
 )
 BehaviorTreeNode = TypeVar("BehaviorTreeNode", bound=py_trees.behaviour.Behaviour)
 BehaviorTree = TypeVar("BehaviorTree", bound=BehaviorTreeNode)
-BehaviorLibrary = TypeVar("BehaviorLibrary", bound=List[BehaviorTreeNode])
+BehaviorLibrary = TypeVar(
+    "BehaviorLibrary", bound=Union[List[BehaviorTreeNode], Tuple[BehaviorTreeNode, ...]]
+)
 TreeOrLibrary = TypeVar("TreeOrLibrary", bound=Union[BehaviorTree, BehaviorLibrary])
 
 
+# =============================================================================
+# Caching
+# =============================================================================
+
+# Bumped by every atomic operation which changes the structure of a tree.
+# Anything computed from a tree's structure can be reused until it changes.
+_mutation_epoch = 0
+
+
+def _mark_mutated() -> None:
+    global _mutation_epoch
+    _mutation_epoch += 1
+
+
+def _index_children(parent: py_trees.behaviour.Behaviour, start: int = 0) -> None:
+    """Store each child's index on the child itself, from `start` onwards.
+    The atomic operations call this for the part of a child list they shifted,
+    so get_position can find a node's index without scanning its siblings.
+    """
+    children = parent.children
+    for index in range(start, len(children)):
+        children[index]._child_index = index
+
+
+def cache_until_mutation(function: Callable) -> Callable:
+    """Cache `function(tree, ...)` per tree until the next atomic operation.
+    This assumes trees are only changed using the atomic operations below.
+    Examples:
+        >>> calls = []
+        >>> @cache_until_mutation
+        ... def count_nodes(tree):
+        ...     calls.append(tree)
+        ...     return len(list(iterate_nodes(tree)))
+        >>> tree = py_trees.composites.Sequence("", False, children=[
+        ...     py_trees.behaviours.Dummy()
+        ... ])
+        >>> count_nodes(tree), count_nodes(tree), len(calls)
+        (2, 2, 1)
+
+        >>> insert(py_trees.behaviours.Dummy(), (tree, 0))
+        >>> count_nodes(tree), len(calls)
+        (3, 2)
+
+        Calls with different arguments are cached separately:
+        >>> @cache_until_mutation
+        ... def count_named(tree, name):
+        ...     calls.append(name)
+        ...     return sum(node.name == name for node in iterate_nodes(tree))
+        >>> count_named(tree, "Dummy"), count_named(tree, ""), count_named(tree, "Dummy")
+        (2, 1, 2)
+        >>> calls[2:]
+        ['Dummy', '']
+    """
+
+    @wraps(function)
+    def wrapper(tree, *args, **kwargs):
+        key = (function, args, tuple(kwargs.items()))
+        # Stored on the tree itself, like _child_index, so the cached values
+        # (which often refer back to the tree) go away along with the tree.
+        cached_values = tree.__dict__.setdefault("_cached_until_mutation", {})
+        cached = cached_values.get(key)
+        if cached is not None and cached[0] == _mutation_epoch:
+            return cached[1]
+        value = function(tree, *args, **kwargs)
+        cached_values[key] = (_mutation_epoch, value)
+        return value
+
+    return wrapper
+
+
+@cache
+def is_composite_type(cls: type) -> bool:
+    """Check whether a node class is a composite, caching the answer per class.
+    Composite is an abstract base class, so `isinstance` goes through
+    `ABCMeta.__instancecheck__` on every call; this only does that once per class.
+    Examples:
+        >>> is_composite_type(py_trees.composites.Sequence)
+        True
+        >>> is_composite_type(py_trees.behaviours.Dummy)
+        False
+    """
+    return issubclass(cls, py_trees.composites.Composite)
+
+
 # =============================================================================
 # Atomic operations
 # =============================================================================
@@ -62,10 +160,13 @@ def remove(node: ExistingNode) -> ExistingNode:
             % (node)
         )
         raise ValueError(msg)
-    elif isinstance(node.parent, py_trees.composites.Composite):
-        node.parent.remove_child(node)
+    elif is_composite_type(type(node.parent)):
+        parent = node.parent
+        index = parent.remove_child(node)
+        _index_children(parent, index)
     else:
         raise NotImplementedError()
+    _mark_mutated()
     return node
 
 
@@ -97,6 +198,8 @@ def insert(node: NewNode, where: CompositeIndex) -> None:
     """
     parent, index = where
     parent.insert_child(node, index)
+    _index_children(parent, min(index, len(parent.children) - 1) if index >= 0 else 0)
+    _mark_mutated()
     return
 
 
@@ -132,6 +235,16 @@ def move(
             --> Failure
     """
     parent, index = where
+    if node.parent is parent:
+        # Reordering within one parent: shift the node along the list
+        # rather than detaching it and attaching it again.
+        children = parent.children
+        _, current_index = get_position(node)
+        if current_index != index:
+            children.insert(index, children.pop(current_index))
+            _index_children(parent, max(min(current_index, index), 0))
+            _mark_mutated()
+        return
     insert(remove(node), (parent, index))
     return
 
@@ -216,13 +329,28 @@ def exchange(
                 --> A
     """
 
-    node0_parent = node0.parent
-    node0_index = node0.parent.children.index(node0)
-    node1_parent = node1.parent
-    node1_index = node1.parent.children.index(node1)
+    node0_parent, node0_index = get_position(node0)
+    node1_parent, node1_index = get_position(node1)
+
+    if node0_parent is node1_parent:
+        # Siblings just trade places; nothing else in the list moves.
+        children = node0_parent.children
+        children[node0_index], children[node1_index] = node1, node0
+        node0._child_index, node1._child_index = node1_index, node0_index
+        _mark_mutated()
+        return
 
-    move(node0, (node1_parent, node1_index))
-    move(node1, (node0_parent, node0_index))
+    # Take both nodes out before putting either back,
+    # so neither target position is shifted by the other node's move.
+    node0_parent.remove_child(node0)
+    node1_parent.remove_child(node1)
+
+    node0_parent.insert_child(node1, node0_index)
+    node1_parent.insert_child(node0, node1_index)
+
+    _index_children(node0_parent, node0_index)
+    _index_children(node1_parent, node1_index)
+    _mark_mutated()
 
     return
 
@@ -258,9 +386,17 @@ def iterate_nodes(tree: py_trees.behaviour.Behaviour):
          <py_trees.composites.Sequence object at 0x...>,
          <py_trees.behaviours.Dummy object at 0x...>]
     """
-    yield tree
-    for child in tree.children:
-        yield from iterate_nodes(child)
+    # Depth-first, pre-order walk with an explicit stack, so deep trees
+    # don't need one generator frame per level.
+    # Children are pushed in reverse so the first child is visited first.
+    # Most nodes are leaves, which don't need anything pushed at all.
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = node.children
+        if children:
+            stack.extend(reversed(children))
 
 
 def enumerate_nodes(tree: py_trees.behaviour.Behaviour):
@@ -300,12 +436,165 @@ def enumerate_nodes(tree: py_trees.behaviour.Behaviour):
     return enumerate(iterate_nodes(tree))
 
 
+def iterate_nodes_with_depth(tree: py_trees.behaviour.Behaviour, depth: int = 0):
+    """Like iterate_nodes, but also yields how deep each node is.
+    Examples:
+        >>> tree = py_trees.composites.Sequence("S0", False, children=[
+        ...     py_trees.behaviours.Dummy("A"),
+        ...     py_trees.composites.Sequence("S1", False, children=[
+        ...         py_trees.behaviours.Dummy("B"),
+        ...     ]),
+        ... ])
+        >>> [(depth, node.name) for depth, node in iterate_nodes_with_depth(tree)]
+        [(0, 'S0'), (1, 'A'), (1, 'S1'), (2, 'B')]
+    """
+    stack = [(depth, tree)]
+    while stack:
+        depth, node = stack.pop()
+        yield depth, node
+        children = node.children
+        if children:
+            depth += 1
+            stack.extend([(depth, child) for child in reversed(children)])
+
+
+@cache_until_mutation
+def flatten_nodes(tree: py_trees.behaviour.Behaviour) -> Tuple[BehaviorTreeNode, ...]:
+    """All the nodes of a tree in iterate_nodes order, walked once per mutation.
+    The mappings used by the prompts share this rather than each walking the tree.
+    Examples:
+        >>> tree = py_trees.composites.Sequence("S0", False, children=[
+        ...     py_trees.behaviours.Dummy("A"),
+        ...     py_trees.behaviours.Dummy("B"),
+        ... ])
+        >>> [node.name for node in flatten_nodes(tree)]
+        ['S0', 'A', 'B']
+        >>> flatten_nodes(tree) is flatten_nodes(tree)
+        True
+    """
+    return tuple(iterate_nodes(tree))
+
+
+@cache
+def _symbol_kind(cls: type) -> str:
+    """Which py_trees.display symbol a class of node gets, before memory is considered."""
+    if issubclass(cls, py_trees.composites.Parallel):
+        return "parallel"
+    if issubclass(cls, py_trees.decorators.Decorator):
+        return "decorator"
+    if issubclass(cls, py_trees.composites.Sequence):
+        return "sequence"
+    if issubclass(cls, py_trees.composites.Selector):
+        return "selector"
+    return "behaviour"
+
+
+def text_tree(
+    tree: py_trees.behaviour.Behaviour,
+    symbols: py_trees.display.Symbols = py_trees.display.unicode_symbols,
+) -> str:
+    """Render a tree the same way as py_trees.display.unicode_tree or ascii_tree.
+    The lines are built in one walk of the tree and joined once at the end.
+    Statuses aren't shown, so this is only for trees which aren't being ticked.
+    Examples:
+        >>> tree = py_trees.composites.Sequence("S0", False, children=[
+        ...     py_trees.behaviours.Dummy("A"),
+        ...     py_trees.composites.Selector("S1", True, children=[
+        ...         py_trees.behaviours.Dummy("B"),
+        ...     ]),
+        ... ])
+        >>> print(text_tree(tree))
+        [-] S0
+            --> A
+            {o} S1
+                --> B
+        <BLANKLINE>
+        >>> text_tree(tree) == py_trees.display.unicode_tree(tree)
+        True
+    """
+    tip = tree.tip()
+    bold, bold_reset = symbols["bold"], symbols["bold_reset"]
+    indent = symbols["space"] * 4
+    lines = []
+    for depth, node in iterate_nodes_with_depth(tree):
+        kind = _symbol_kind(type(node))
+        if kind == "sequence" or kind == "selector":
+            kind += "_with_memory" if node.memory else "_without_memory"
+        symbol = symbols[kind]
+        name = node.name.replace("\n", " ")
+        if node is tip:
+            symbol = bold + symbol + bold_reset
+            name = bold + name + bold_reset
+        lines.append(f"{indent * depth}{symbol} {name}\n")
+    return "".join(lines)
+
+
+unicode_tree = partial(text_tree, symbols=py_trees.display.unicode_symbols)
+ascii_tree = partial(text_tree, symbols=py_trees.display.ascii_symbols)
+
+
+def get_position(node: py_trees.behaviour.Behaviour):
+    """Get the parent of a node and its index among the parent's children.
+    Examples:
+        >>> tree = py_trees.composites.Sequence("", False, children=[
+        ...     a := py_trees.behaviours.Dummy("A"),
+        ...     b := py_trees.behaviours.Dummy("B"),
+        ... ])
+        >>> get_position(b)[1]
+        1
+
+        If the tree was changed without using the atomic operations,
+        the recorded index is out of date, so it's looked up again:
+        >>> tree.remove_child(a)
+        0
+        >>> get_position(b)[1]
+        0
+    """
+    parent = node.parent
+    children = parent.children
+    # The recorded index is only trusted if it still points at this node
+    index = getattr(node, "_child_index", None)
+    if index is None or index >= len(children) or children[index] is not node:
+        index = children.index(node)
+        node._child_index = index
+    return parent, index
+
+
+@cache_until_mutation
+def render_tree(
+    tree: py_trees.behaviour.Behaviour,
+    representation=unicode_tree,
+) -> str:
+    """Render a tree for display, reusing the result until the tree is mutated.
+    Examples:
+        >>> tree = py_trees.composites.Sequence("S", False, children=[
+        ...     py_trees.behaviours.Dummy()
+        ... ])
+        >>> print(render_tree(tree))  # doctest: +NORMALIZE_WHITESPACE
+        [-] S
+            --> Dummy
+        >>> render_tree(tree) is render_tree(tree)
+        True
+
+        Each representation is kept, so alternating between them doesn't re-render:
+        >>> ascii_rendering = render_tree(tree, ascii_tree)
+        >>> unicode_rendering = render_tree(tree, unicode_tree)
+        >>> render_tree(tree, ascii_tree) is ascii_rendering
+        True
+        >>> render_tree(tree, unicode_tree) is unicode_rendering
+        True
+    """
+    return representation(tree)
+
+
 def label_tree_lines(
     tree: py_trees.behaviour.Behaviour,
     labels: List[str],
-    representation=py_trees.display.unicode_tree,
+    representation=unicode_tree,
+    width: Optional[int] = None,
 ) -> str:
     """Label the lines of a tree.
+    Labels are right-aligned to `width`, which defaults to the longest label's length.
     Examples:
         >>> print(label_tree_lines(py_trees.behaviours.Dummy(), labels=["0"]))
         0: --> Dummy
@@ -331,21 +620,24 @@ def label_tree_lines(
          BB:     --> Dummy
           C:     --> Dummy
           O:
+
+        Callers which already know how wide their labels are can pass that:
+        >>> print(label_tree_lines(tree, labels=["0", "1", "2"], width=2))
+         0: [-] S1
+         1:     --> Dummy
+         2:     --> Dummy
     """
-    max_len = max([len(s) for s in labels])
-    padded_labels = [s.rjust(max_len) for s in labels]
+    max_len = max(map(len, labels), default=0) if width is None else width
 
     tree_representation_lines = representation(tree).split("\n")
 
-    enumerated_tree_representation_lines = [
+    output = "\n".join(
         # Make the line. If `t` is missing,
         # then we don't want a trailing space
         # so we strip that away
-        f"{i}: {t}".rstrip()
-        for i, t in zip(padded_labels, tree_representation_lines)
-    ]
-
-    output = "\n".join(enumerated_tree_representation_lines)
+        f"{i.rjust(max_len)}: {t}".rstrip()
+        for i, t in zip(labels, tree_representation_lines)
+    )
     return output
 
 
@@ -371,7 +663,14 @@ def prompt_identify(
     ],
     message: str = "Which?",
     display_nodes: bool = True,
+    dense_labels: bool = False,
 ) -> BehaviorIdentifier:
+    """Show the labelled tree or library and ask the user to pick a label.
+
+    If `function` always labels its options "0", "1", ..., "N-1",
+    set `dense_labels`, and the answer is checked against a range
+    rather than compared with every label.
+    """
 
     mapping, labels, representation = function(tree)
 
@@ -380,11 +679,15 @@ def prompt_identify(
     else:
         text = f"{message}"
 
-    key = click.prompt(text=text, type=click.Choice(labels))
+    if dense_labels:
+        key = str(click.prompt(text=text, type=click.IntRange(0, len(labels) - 1)))
+    else:
+        key = click.prompt(text=text, type=click.Choice(labels))
     node = mapping[key]
     return node
 
 
+@cache_until_mutation
 def get_node_mapping(tree: BehaviorTree) -> NodeMappingRepresentation:
     """
     Examples:
@@ -411,13 +714,16 @@ def get_node_mapping(tree: BehaviorTree) -> NodeMappingRepresentation:
         1:     --> Dummy
 
     """
-    mapping = {str(i): n for i, n in enumerate_nodes(tree)}
+    mapping = {str(i): n for i, n in enumerate(flatten_nodes(tree))}
     labels = list(mapping.keys())
-    representation = label_tree_lines(tree=tree, labels=labels)
+    # The labels count up from 0, so the last is the widest
+    representation = label_tree_lines(tree=tree, labels=labels, width=len(labels[-1]))
     return NodeMappingRepresentation(mapping, labels, representation)
 
 
-prompt_identify_node = partial(prompt_identify, function=get_node_mapping)
+prompt_identify_node = partial(
+    prompt_identify, function=get_node_mapping, dense_labels=True
+)
 
 
 def get_library_mapping(library: BehaviorLibrary) -> NodeMappingRepresentation:
@@ -446,16 +752,18 @@ def get_library_mapping(library: BehaviorLibrary) -> NodeMappingRepresentation:
         0: Success
         1: Failure
     """
-
     mapping = {str(i): n for i, n in enumerate(library)}
     labels = list(mapping.keys())
     representation = "\n".join([f"{i}: {n.name}" for i, n in enumerate(library)])
     return NodeMappingRepresentation(mapping, labels, representation)
 
 
-prompt_identify_library_node = partial(prompt_identify, function=get_library_mapping)
+prompt_identify_library_node = partial(
+    prompt_identify, function=get_library_mapping, dense_labels=True
+)
 
 
+@cache_until_mutation
 def get_composite_mapping(tree: BehaviorTree, skip_label="_"):
     """
     Examples:
@@ -483,15 +791,16 @@ def get_composite_mapping(tree: BehaviorTree, skip_label="_"):
     mapping = {}
     display_labels, allowed_labels = [], []
 
-    for i, node in enumerate_nodes(tree):
+    for i, node in enumerate(flatten_nodes(tree)):
         label = str(i)
-        if isinstance(node, py_trees.composites.Composite):
+        if is_composite_type(type(node)):
             mapping[label] = node
             display_labels.append(label)
             allowed_labels.append(label)
         else:
             display_labels.append(skip_label)
-    representation = label_tree_lines(tree=tree, labels=display_labels)
+    width = max(len(skip_label), len(allowed_labels[-1]) if allowed_labels else 0)
+    representation = label_tree_lines(tree=tree, labels=display_labels, width=width)
 
     return NodeMappingRepresentation(mapping, allowed_labels, representation)
 
@@ -499,6 +808,7 @@ def get_composite_mapping(tree: BehaviorTree, skip_label="_"):
 prompt_identify_composite = partial(prompt_identify, function=get_composite_mapping)
 
 
+@cache_until_mutation
 def get_child_index_mapping(tree: BehaviorTree, skip_label="_"):
     """
     Examples:
@@ -528,13 +838,16 @@ def get_child_index_mapping(tree: BehaviorTree, skip_label="_"):
     mapping = {}
     display_labels, allowed_labels = [], []
 
-    for node in iterate_nodes(tree):
-        if node in tree.children:
-            index = tree.children.index(node)
+    # The walk is pre-order, so direct children turn up in order
+    # and the next index is just the number seen so far.
+    index = 0
+    for node in flatten_nodes(tree):
+        if node.parent is tree:
             label = str(index)
             mapping[label] = index
             allowed_labels.append(label)
             display_labels.append(label)
+            index += 1
         else:
             display_labels.append(skip_label)
 
@@ -545,12 +858,15 @@ def get_child_index_mapping(tree: BehaviorTree, skip_label="_"):
     display_labels.append(post_list_label)
     mapping[post_list_label] = post_list_index
 
-    representation = label_tree_lines(tree=tree, labels=display_labels)
+    width = max(len(skip_label), len(post_list_label))
+    representation = label_tree_lines(tree=tree, labels=display_labels, width=width)
 
     return NodeMappingRepresentation(mapping, allowed_labels, representation)
 
 
-prompt_identify_child_index = partial(prompt_identify, function=get_child_index_mapping)
+prompt_identify_child_index = partial(
+    prompt_identify, function=get_child_index_mapping, dense_labels=True
+)
 
 
 def get_position_mapping(tree):
@@ -583,15 +899,41 @@ def get_position_mapping(tree):
 
 
 # Wrapper functions for the atomic operations which give them a UI.
-MutationResult = namedtuple("MutationResult", ["result", "tree", "function", "kwargs"])
+@dataclass(slots=True)
+class MutationResult:
+    result: Any
+    tree: py_trees.behaviour.Behaviour
+    function: Callable
+    kwargs: Dict[str, Any]
 
 
-def mutate_chooser(*fs: Union[Callable], message="Which action?"):
-    """Prompt the user to choose one of the functions f.
-    Returns the wrapped version of the function.
+@cache
+def get_summary(f: Callable) -> str:
+    """Get the first line of a function's docstring, falling back to its name.
+    Examples:
+        >>> get_summary(remove)
+        'Remove a node.'
+
+        >>> def undocumented():
+        ...     pass
+        >>> get_summary(undocumented)
+        'undocumented'
     """
-    n_fs = len(fs)
-    docstring_summaries = [f_.__doc__.split("\n")[0] for f_ in fs]
+    doc = f.__doc__
+    return (doc.partition("\n")[0] if doc else "") or f.__name__
+
+
+@cache
+def _build_chooser_text(fs: Tuple[Callable, ...], message: str) -> str:
+    """Build the menu shown by mutate_chooser.
+    The set of functions doesn't change during an experiment, so this is cached.
+    Examples:
+        >>> print(_build_chooser_text((insert, remove), "Which action?"))
+        0: Insert a new node.
+        1: Remove a node.
+        Which action?
+    """
+    docstring_summaries = [get_summary(f_) for f_ in fs]
     text = (
         "\n".join(
             [
@@ -601,12 +943,28 @@ def mutate_chooser(*fs: Union[Callable], message="Which action?"):
         )
         + f"\n{message}"
     )
-    i = click.prompt(text=text, type=click.IntRange(0, n_fs - 1))
+    return text
+
+
+@lru_cache(maxsize=8)
+def _chooser_range(n_fs: int) -> click.IntRange:
+    """The param type accepting an index into `n_fs` functions, built once per size."""
+    return click.IntRange(0, n_fs - 1)
+
+
+def mutate_chooser(*fs: Union[Callable], message="Which action?"):
+    """Prompt the user to choose one of the functions f.
+    Returns the wrapped version of the function.
+    """
+    n_fs = len(fs)
+    text = _build_chooser_text(fs, message)
+    i = click.prompt(text=text, type=_chooser_range(n_fs))
     f = mutate_ui(fs[i])
 
     return f
 
 
+@cache
 def mutate_ui(
     f: Callable,
 ) -> Callable[
@@ -616,17 +974,22 @@ def mutate_ui(
     This creates a version of the atomic function `f`
     which prompts the user for the appropriate arguments
     based on `f`'s type annotations.
+    The wrapper is cached, so the signature is only inspected once per function.
     """
 
     signature = inspect.signature(f)
+    # Read the parameters once here, rather than every time `f_inner` runs
+    parameter_annotations = tuple(
+        (parameter_name, str(parameter.annotation))
+        for parameter_name, parameter in signature.parameters.items()
+    )
 
     @wraps(f)
     def f_inner(tree, library):
         kwargs = {}
-        for parameter_name in signature.parameters.keys():
-            annotation = signature.parameters[parameter_name].annotation
-            _logger.debug(f"getting arguments for {annotation=}")
-            value = prompt_get_mutate_arguments(annotation, tree, library)
+        for parameter_name, annotation in parameter_annotations:
+            _logger.debug("getting arguments for annotation=%s", annotation)
+            value = prompt_get_mutate_arguments_str(annotation, tree, library)
             kwargs[parameter_name] = value
         inner_result = f(**kwargs)
         return_value = MutationResult(
@@ -638,33 +1001,65 @@ def mutate_ui(
     return f_inner
 
 
+def _no_argument(tree, library):
+    _logger.debug("No argument annotation, returning None")
+    return None
+
+
+def _prompt_existing_node(tree, library):
+    _logger.debug("in ExistingNode")
+    node = prompt_identify_node(tree)
+    return node
+
+
+def _prompt_composite_index(tree, library):
+    _logger.debug("in CompositeIndex")
+    composite_node = prompt_identify_composite(tree, message="Which parent?")
+    index = prompt_identify_child_index(composite_node)
+    return composite_node, index
+
+
+def _prompt_new_node(tree, library):
+    _logger.debug("in NewNode")
+    new_node = prompt_identify_library_node(
+        library, message="Which node from the library?"
+    )
+    return new_node
+
+
+# Maps the string form of each argument annotation to the prompt which gets it.
+# Computed once here so each argument costs one dict lookup.
+_ARGUMENT_PROMPTS = {
+    str(inspect.Parameter.empty): _no_argument,
+    str(ExistingNode): _prompt_existing_node,
+    str(CompositeIndex): _prompt_composite_index,
+    str(NewNode): _prompt_new_node,
+}
+
+
 def prompt_get_mutate_arguments(annotation: GenericAlias, tree, library):
     """Prompt the user to specify nodes and positions in the tree."""
     annotation_ = str(annotation)
     assert isinstance(annotation_, str)
+    return prompt_get_mutate_arguments_str(annotation_, tree, library)
 
-    if annotation_ == str(inspect.Parameter.empty):
-        _logger.debug("No argument annotation, returning None")
-        return None
-    elif annotation_ == str(ExistingNode):
-        _logger.debug("in ExistingNode")
-        node = prompt_identify_node(tree)
-        return node
-    elif annotation_ == str(CompositeIndex):
-        _logger.debug("in CompositeIndex")
-        composite_node = prompt_identify_composite(tree, message="Which parent?")
-        index = prompt_identify_child_index(composite_node)
-        return composite_node, index
-    elif annotation_ == str(NewNode):
-        _logger.debug("in NewNode")
-        new_node = prompt_identify_library_node(
-            library, message="Which node from the library?"
-        )
-        return new_node
-    else:
+
+def prompt_get_mutate_arguments_str(annotation: str, tree, library):
+    """Like prompt_get_mutate_arguments, for an annotation which is already a string.
+    Examples:
+        >>> prompt_get_mutate_arguments_str(str(inspect.Parameter.empty), None, None)
+
+        >>> prompt_get_mutate_arguments_str("~Unknown", None, None)
+        Traceback (most recent call last):
+        ...
+        NotImplementedError: Can't work out what to do with ~Unknown
+    """
+    prompt = _ARGUMENT_PROMPTS.get(annotation)
+    if prompt is None:
         _logger.debug("in 'else'")
         msg = "Can't work out what to do with %s" % annotation
         raise NotImplementedError(msg)
+    return prompt(tree, library)
 
 
 # =============================================================================
@@ -714,14 +1109,14 @@ def load_experiment():
             py_trees.behaviours.Success(),
         ],
     )
-    library = [py_trees.behaviours.Success(), py_trees.behaviours.Failure()]
+    library = (py_trees.behaviours.Success(), py_trees.behaviours.Failure())
     return tree, library
 
 
 def save_results(tree, protocol):
     _logger.info("saving results")
     print(f"protocol: {protocol}")
-    print(f"tree:\n{py_trees.display.unicode_tree(tree)}")
+    print(f"tree:\n{unicode_tree(tree)}")
 
 
 app = typer.Typer()
@@ -733,12 +1128,17 @@ def main():
     tree, library = load_experiment()
     protocol = []
 
+    # When the output is redirected (e.g. a scripted run),
+    # nobody sees the tree after each mutation, so don't render it.
+    interactive = sys.stdout.isatty()
+
     # The main loop of the experiment
     while f := mutate_chooser(insert, move, exchange, remove, end_experiment):
         results = f(tree, library)
         _logger.debug(results)
         protocol.append(results)
-        print(py_trees.display.ascii_tree(tree))
+        if interactive:
+            print(render_tree(tree, ascii_tree))
 
 
 if __name__ == "__main__":
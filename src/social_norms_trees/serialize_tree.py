@@ -26,17 +26,37 @@ def serialize_tree(tree, include_children=True):
         {'type': 'CustomSequence', 'name': 'root', 'display_name': 'display root', 'id_': 'theid', 'children': [{'type': 'Dummy', 'name': 'Dummy'}]}
     """
 
+    data = _serialize_node(tree)
+    if not include_children or not tree.children:
+        return data
+
+    # Walk the tree with an explicit stack rather than recursing,
+    # so deep trees don't run into the recursion limit.
+    # Only nodes with children are pushed; their dicts are already
+    # in their parent's "children" list, and just need filling in.
+    stack = [(tree, data)]
+    while stack:
+        node, node_data = stack.pop()
+        children_data = node_data["children"] = []
+        for child in node.children:
+            child_data = _serialize_node(child)
+            children_data.append(child_data)
+            if child.children:
+                stack.append((child, child_data))
+
+    return data
+
+
+def _serialize_node(node):
+    """Serialize a single node, without its children."""
     data = {
-        "type": tree.__class__.__name__,
-        "name": tree.name,
+        "type": node.__class__.__name__,
+        "name": node.name,
     }
-    if hasattr(tree, "display_name"):
-        data["display_name"] = tree.display_name
-    if hasattr(tree, "id_"):
-        data["id_"] = tree.id_
-    if include_children and tree.children:
-        data["children"] = [serialize_tree(child) for child in tree.children]
-
+    if hasattr(node, "display_name"):
+        data["display_name"] = node.display_name
+    if hasattr(node, "id_"):
+        data["id_"] = node.id_
     return data
 
 
@@ -81,55 +101,91 @@ def deserialize_library_element(description: dict):
     )
 
     node_type = description["type"]
-    assert node_type in {"Sequence", "Selector", "Behavior"}, (
+    build = _LIBRARY_ELEMENT_BUILDERS.get(node_type)
+    assert build is not None, (
         f"\nThere was an invalid configuration detected in the inputted behavior tree: "
         f"Invalid node type '{node_type}' found for node '{description['name']}'. "
         f"Please ensure that all node types are correct and supported."
     )
 
-    if node_type == "Sequence":
-        if "children" in description.keys():
-            children = [
-                deserialize_library_element(child) for child in description["children"]
-            ]
-        else:
-            children = []
+    return build(description)
 
-        node = CustomSequence(
-            name=description["name"],
-            id_=description["id"],
-            display_name=description["name"],
-            children=children,
-        )
 
-    elif node_type == "Behavior":
-        assert "children" not in description or len(description["children"]) == 0, (
-            f"\nThere was an invalid configuration detected in the inputted behavior tree: "
-            f"Children were detected for Behavior type node '{description['name']}': "
-            f"Behavior nodes should not have any children. Please check the structure of your behavior tree."
-        )
+def _build_library_sequence(description: dict):
+    children = [
+        deserialize_library_element(child) for child in description.get("children", [])
+    ]
 
-        node = CustomBehavior(
-            name=description["name"],
-            id_=description["id"],
-            display_name=description["name"],
-        )
+    return CustomSequence(
+        name=description["name"],
+        id_=description["id"],
+        display_name=description["name"],
+        children=children,
+    )
+
+
+def _build_library_behavior(description: dict):
+    assert "children" not in description or len(description["children"]) == 0, (
+        f"\nThere was an invalid configuration detected in the inputted behavior tree: "
+        f"Children were detected for Behavior type node '{description['name']}': "
+        f"Behavior nodes should not have any children. Please check the structure of your behavior tree."
+    )
 
-    else:
-        msg = "node_type=%s is not implemented" % node_type
-        raise NotImplementedError(msg)
+    return CustomBehavior(
+        name=description["name"],
+        id_=description["id"],
+        display_name=description["name"],
+    )
+
+
+def _build_library_not_implemented(description: dict):
+    msg = "node_type=%s is not implemented" % description["type"]
+    raise NotImplementedError(msg)
 
-    return node
+
+# The supported node types, and how to build each one.
+# Looking the type up here replaces a chain of string comparisons.
+_LIBRARY_ELEMENT_BUILDERS = {
+    "Sequence": _build_library_sequence,
+    "Selector": _build_library_not_implemented,
+    "Behavior": _build_library_behavior,
+}
 
 
 def deserialize_tree(tree, behavior_library):
-    def deserialize_node(node):
-        assert type(node["type"] == str), (
+    """
+    Examples:
+        >>> from social_norms_trees.behavior_library import BehaviorLibrary
+        >>> library = BehaviorLibrary([
+        ...     {"type": "Sequence", "name": "Sequence 0", "id": "s0"},
+        ...     {"type": "Behavior", "name": "Behavior 0", "id": "b0"},
+        ... ])
+        >>> tree = deserialize_tree(
+        ...     {"type": "Sequence", "name": "Sequence 0", "children": [
+        ...         {"type": "Behavior", "name": "Behavior 0"},
+        ...     ]},
+        ...     library,
+        ... )
+        >>> serialize_tree(tree)  # doctest: +NORMALIZE_WHITESPACE
+        {'type': 'CustomSequence', 'name': 'Sequence 0', 'display_name': 'Sequence 0', 'id_': 's0',
+         'children': [{'type': 'CustomBehavior', 'name': 'Behavior 0', 'display_name': 'Behavior 0', 'id_': 'b0'}]}
+
+        Names which aren't strings are rejected:
+        >>> deserialize_tree({"type": "Behavior", "name": 0}, library)
+        Traceback (most recent call last):
+        ...
+        AssertionError: ...Invalid type for node attribute 'name' found for node '0'...
+    """
+    # Looked up once here, rather than once per node
+    behavior_from_display_name = behavior_library.behavior_from_display_name
+
+    def validate_node(node):
+        assert isinstance(node["type"], str), (
             f"\nThere was an invalid configuration detected in the inputted behavior tree: "
             f"Invalid type for node attribute 'type' found for node '{node['name']}'. "
             f"Please ensure that the 'name' attribute is a string."
         )
-        assert type(node["name"] == str), (
+        assert isinstance(node["name"], str), (
             f"\nThere was an invalid configuration detected in the inputted behavior tree: "
             f"Invalid type for node attribute 'name' found for node '{node['name']}'. "
             f"Please ensure that the 'name' attribute is a string."
@@ -142,41 +198,59 @@ def deserialize_tree(tree, behavior_library):
             f"Please ensure that all node types are correct and supported."
         )
 
-        behavior = behavior_library.behavior_from_display_name[node["name"]]
+        if node_type == "Behavior":
+            assert "children" not in node or len(node["children"]) == 0, (
+                f"\nThere was an invalid configuration detected in the inputted behavior tree: "
+                f"Children were detected for Behavior type node '{node['name']}': "
+                f"Behavior nodes should not have any children. Please check the structure of your behavior tree."
+            )
+
+    def build_node(node, behavior, children):
+        # The node has already been validated, so this only constructs it
+        if not behavior:
+            raise ValueError(f"Behavior {node['name']} not found in behavior library")
 
+        node_type = node["type"]
         if node_type == "Sequence":
-            children = [deserialize_node(child) for child in node["children"]]
-
-            if behavior:
-                return CustomSequence(
-                    name=behavior["name"],
-                    id_=behavior["id"],
-                    display_name=behavior["name"],
-                    children=children,
-                )
-            else:
-                raise ValueError(
-                    f"Behavior {node['name']} not found in behavior library"
-                )
+            return CustomSequence(
+                name=behavior["name"],
+                id_=behavior["id"],
+                display_name=behavior["name"],
+                children=children,
+            )
 
         # TODO: node type Selector
 
         elif node_type == "Behavior":
-            assert "children" not in node or len(node["children"]) == 0, (
-                f"\nThere was an invalid configuration detected in the inputted behavior tree: "
-                f"Children were detected for Behavior type node '{node['name']}': "
-                f"Behavior nodes should not have any children. Please check the structure of your behavior tree."
+            return CustomBehavior(
+                name=behavior["name"],
+                id_=behavior["id"],
+                display_name=behavior["name"],
             )
 
-            if behavior:
-                return CustomBehavior(
-                    name=behavior["name"],
-                    id_=behavior["id"],
-                    display_name=behavior["name"],
-                )
-            else:
-                raise ValueError(
-                    f"Behavior {node['name']} not found in behavior library"
-                )
-
-    return deserialize_node(tree)
+    # The tree is rebuilt without recursion, so deep trees don't hit the recursion limit.
+    # First, validate every node and find its behavior, listing the nodes in pre-order
+    # with how many children each one has. Nothing is built unless all of them pass.
+    order = []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        validate_node(node)
+        behavior = behavior_from_display_name[node["name"]]
+        children = node["children"] if node["type"] == "Sequence" else []
+        order.append((node, behavior, len(children)))
+        stack.extend(reversed(children))
+
+    # Then build them from the last to the first. By the time a node is reached,
+    # its children are the most recently built nodes, in reverse order.
+    built = []
+    for node, behavior, n_children in reversed(order):
+        if n_children:
+            children = built[-n_children:]
+            del built[-n_children:]
+            children.reverse()
+        else:
+            children = []
+        built.append(build_node(node, behavior, children))
+
+    return built.pop()
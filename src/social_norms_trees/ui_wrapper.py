@@ -5,6 +5,7 @@ import click
 from datetime import datetime
 import json
 import os
+import time
 import uuid
 import py_trees
 import traceback
@@ -13,11 +14,13 @@ import typer
 
 from social_norms_trees.atomic_mutations import (
     QuitException,
+    ascii_tree,
     exchange,
     insert,
     move,
     mutate_chooser,
     remove,
+    render_tree,
     end_experiment,
 )
 from social_norms_trees.serialize_tree import (
@@ -84,7 +87,7 @@ def load_resources(file_path):
 
     behavior_tree = deserialize_tree(behavior_tree, BehaviorLibrary(behavior_list))
 
-    behavior_library = [deserialize_library_element(e) for e in behavior_list]
+    behavior_library = tuple(deserialize_library_element(e) for e in behavior_list)
 
     print("Loading success.")
     return behavior_tree, behavior_library, context_paragraph
@@ -109,7 +112,9 @@ def initialize_experiment_record(db, participant_id, origin_tree):
 
 
 def display_tree(tree):
-    print(py_trees.display.ascii_tree(tree))
+    # Cached until the next mutation, so actions which
+    # didn't change the tree don't cause it to be re-rendered
+    print(render_tree(tree, ascii_tree))
     return
 
 
@@ -132,6 +137,24 @@ def serialize_function_arguments(args):
         return args
 
 
+def format_action_log(action_log):
+    """Replace each action's nanosecond `time` stamp with an ISO 8601 string, in place.
+
+    Examples:
+        >>> log = [{"type": "insert", "time": 1_700_000_000_123_456_789}]
+        >>> format_action_log(log)
+        >>> log[0]["time"] == datetime.fromtimestamp(1_700_000_000.123456).isoformat()
+        True
+    """
+    for action in action_log:
+        seconds, nanoseconds = divmod(action["time"], 1_000_000_000)
+        action["time"] = (
+            datetime.fromtimestamp(seconds)
+            .replace(microsecond=nanoseconds // 1000)
+            .isoformat()
+        )
+
+
 def run_experiment(tree, library):
     # Loop for the actual experiment part, which takes user input to decide which action to take
     print("\nExperiment beginning...\n")
@@ -142,18 +165,23 @@ def run_experiment(tree, library):
         "action_log": [],
     }
 
+    # These don't change between iterations, so look them up once
+    actions = (insert, move, exchange, remove, end_experiment)
+    action_log = results_dict["action_log"]
+
     try:
         while True:
             display_tree(tree)
-            f = mutate_chooser(insert, move, exchange, remove, end_experiment)
+            f = mutate_chooser(*actions)
             if f is end_experiment:
                 break
             results = f(tree, library)
-            results_dict["action_log"].append(
+            action_log.append(
                 {
                     "type": results.function.__name__,
                     "kwargs": serialize_function_arguments(results.kwargs),
-                    "time": datetime.now().isoformat(),
+                    # Formatted once the experiment is over, see format_action_log
+                    "time": time.time_ns(),
                 }
             )
 
@@ -167,6 +195,7 @@ def run_experiment(tree, library):
         results_dict["error_log"] = traceback.format_exc()
 
     # finally:
+    format_action_log(action_log)
     results_dict["final_behavior_tree"] = serialize_tree(tree)
     results_dict["start_time"] = datetime.now().isoformat()
 